@@ -0,0 +1,24 @@
+# coding: utf8
+
+import sys
+
+from . import *
+
+
+def main(paths: [str]) -> int:
+    """Evaluates the given program files one after another, or the standard input if none are given"""
+    vm = VM()
+    env = Env.get_std()
+
+    try:
+        for path in paths or ['-']:
+            for _ in vm.eval_file(path, env):
+                pass
+    except (LispError, OSError, UnicodeDecodeError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    return 0
+
+
+sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,64 @@
+# coding: utf8
+"""
+Measures the fixed cost of running a crisp program in a short-lived process: importing the package, building the
+standard environment and evaluating a trivial script through the command line interface.
+
+Usage: python benchmarks/startup.py [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = os.path.basename(ROOT)
+
+
+def run(*args: str, runs: int) -> float:
+    """Returns the median wall time in milliseconds of running the Python interpreter with the given arguments"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(ROOT))
+    times = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], env=env, check=True, stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1e3)
+
+    return statistics.median(times)
+
+
+def main(runs: int):
+    with tempfile.NamedTemporaryFile('w', suffix='.lisp', delete=False) as script:
+        script.write('(send (+ 1 2))\n')
+
+    try:
+        baseline = run('-c', 'pass', runs=runs)
+        results = [
+            ('python -c pass', baseline),
+            ('import %s' % PACKAGE, run('-c', 'import %s' % PACKAGE, runs=runs)),
+            ('Env.get_std()', run('-c', 'import %s; %s.Env.get_std()' % (PACKAGE, PACKAGE), runs=runs)),
+            ('python -m %s script.lisp' % PACKAGE, run('-m', PACKAGE, script.name, runs=runs)),
+        ]
+    finally:
+        os.unlink(script.name)
+
+    for name, ms in results:
+        print('%-32s %8.2f ms %+8.2f ms' % (name, ms, ms - baseline))
+
+    # in-process cost of the standard environment, built from scratch and copied from the snapshot
+    sys.path.insert(0, os.path.dirname(ROOT))
+    env = __import__(PACKAGE).Env
+
+    for name, fn in (('Env.build_std()', env.build_std), ('Env.get_std() (snapshot)', env.get_std)):
+        fn()
+        start = time.perf_counter()
+        for _ in range(runs):
+            fn()
+        print('%-32s %8.3f ms' % (name, (time.perf_counter() - start) * 1e3 / runs))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,103 @@
+# coding: utf8
+"""
+Checks that user Fns compiled by the tier-up compiler behave like the interpreter, by evaluating the same programs
+with `VM(tier_up=None)` and `VM(tier_up=0)` and comparing their results and errors, and measures the speedup of
+compiled code on a numeric kernel.
+
+Usage: python benchmarks/tier_up.py
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = os.path.basename(ROOT)
+
+PROGRAMS = [
+    # arithmetic, comparisons and numeric promotion
+    '((defun poly (x) (+ (* 3 x x) (* 2 x) 1)) (poly 2) (poly 2.5) (poly 3))',
+    '((defun f (a b) (- a b)) (f 5 3) (f 1 1.5) (f 0 4))',
+    '((defun f (a) (/ a 2)) (f 4) (f 1) (f 0))',
+    '((defun f (a) (< a 3)) (f 1) (f 5) (f 3))',
+    '((defun f (x) (* x x x x x x x x x x)) (f 99999) (f 2) (f 2.0))',
+    '((defun f (a) (& a (| a 1))) (f 6) (f 6.0) (f 7))',
+    '((defun f (x) (+ x 1)) (f 1) (f 2) (f "a"))',
+    '((defun f (x) (/ x 0)) (f 1) (f 2) (f 3))',
+
+    # bindings, `set` and `while`
+    '((let ((i 0))) (defun step () (while (< i 3) (set \'i (+ 1 i)))) (step) i)',
+    '((defun s (n) ((let ((acc 0) (i 0))) (while (< i n) (set \'acc (+ acc i)) (set \'i (+ i 1))) acc)) (s 5) (s 3))',
+    '((defun f (x) ((let ((k (+ x 1)))) (* k 2))) (f 1) (f 2) (f 3))',
+    '((defun f (x) ((const ((k x) w)) (+ k 1))) (f 1) (f 2) (f 3))',
+    '((let ((q 2))) (defun f (x) (* x q)) (f 1) (f 2) (set \'q 3) (f 3))',
+    '((let ((z 0))) (defun f (x) (+ (set \'z x) z)) (f 1) (f 2) (f 3) z)',
+    '((let ((z 0))) (defun f (x) ((x \'z 5) z)) (f set) (f set) (f set) z)',
+    '((defun f (x) (while x)) (f false) (f false) (f 1))',
+
+    # calls, rebinding and forwarding Fns
+    '((defun sq (x) (* x x)) (defun f (x) (sq (sq x))) (f 2) (f 3) (f 1))',
+    '((defun f (x) (+ x 1)) (f 1) (f 2) (f 3) (set \'+ -) (f 1) (f 1) (f 1))',
+    '((defun f (x) (x 1 2)) (f 3) (f +) (f 4))',
+    '((defun f (x) (list (map (lambda (y) (* y x)) (range 3)))) (f 2) (f 3) (f 4))',
+    '((defun f (x y) (+ x y)) (f 1 2) (f 2 2) (f 3))',
+    '((defun f (x y) (+ x 1)) (f 1 2) (f 2) (f 3 4) (f 5))',
+    '((defun f (x) (undefined)) (f 1) (f 2))',
+
+    # conditional special forms
+    '((defun fib (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))) (fib 10) (fib 1))',
+    '((defun f (x) (if (< x 2) "s" x)) (f 1) (f 3) (f 0))',
+    '((defun f (x) (if x 1 2)) (f true) (f false) (f 3))',
+    '((defun f (x) (if (< x 1) (set \'q 1) 0)) (f 2) (f 2) (f 0))',
+    '((defun f (x) (cond ((< x 0) -1) ((= x 0) 0) (true 1))) (f -5) (f 0) (f 2.5))',
+    '((defun f (x) (cond ((< x 0) -1))) (f -5) (f 0) (f 3))',
+    '((defun f (x) (and (< 0 x) (< x 10))) (f 5) (f -1) (f 11))',
+    '((defun f (x) (or false (< x 1) (undefined))) (f 0) (f 0) (f 5))',
+    '((defun f (x) (and)) (defun g (x) (or)) (f 1) (g 1))',
+    '((let ((n 0))) (defun f (x) (while (and (< n x) (!= n 4)) (set \'n (+ n 1)))) (f 2) (f 6) n)',
+
+    # forms longer than the nesting limits of Python
+    '((defun f (x) (cond %s (true -1))) (f 5) (f 119) (f 200))' %
+    ' '.join('((= x %d) %d)' % (i, i) for i in range(120)),
+    '((defun f (x) (and %s)) (f 5) (f 200))' % ' '.join('(< x %d)' % (i + 10) for i in range(110)),
+    '((defun f (x) (or %s)) (f 5) (f 200))' % ' '.join('(= x %d)' % i for i in range(110)),
+]
+
+KERNEL = """((let ((i 0) (acc 0)))
+ (defun poly (x) (+ (* 3 x x) (* 2 x) 1))
+ (defun kernel (n) ((while (< i n) (set 'acc (+ acc (poly i))) (set 'i (+ i 1))) acc))
+ (kernel 20000))"""
+
+
+def evaluate(lisp, program: str, tier_up: int) -> str:
+    """Evaluates a program and returns the representation of its result or the first line of its error"""
+    try:
+        return repr(lisp.VM(tier_up=tier_up).eval(program))
+    except Exception as e:
+        return '%s: %s' % (type(e).__name__, str(e).splitlines()[0])
+
+
+def main() -> int:
+    sys.path.insert(0, os.path.dirname(ROOT))
+    lisp = __import__(PACKAGE)
+    failures = 0
+
+    for program in PROGRAMS:
+        interpreted, compiled = evaluate(lisp, program, None), evaluate(lisp, program, 0)
+
+        if interpreted != compiled:
+            failures += 1
+            print('MISMATCH %s\n  interpreter: %s\n  compiled:    %s' % (program, interpreted, compiled))
+
+    print('%d/%d programs match the interpreter' % (len(PROGRAMS) - failures, len(PROGRAMS)))
+
+    for tier_up in (None, 0):
+        start = time.perf_counter()
+        lisp.VM(tier_up=tier_up).eval(KERNEL)
+        print('%-20s %8.3f s' % ('tier_up=%s' % tier_up, time.perf_counter() - start))
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,648 @@
+# coding: utf8
+
+from collections.abc import Callable
+
+from . import *
+
+
+class Deopt(Exception):
+    """Raised on entry to compiled code when an assumption made while compiling it no longer holds"""
+    pass
+
+
+class NotCompilable(Exception):
+    """Raised when the body of a Fn uses a construct the Compiler doesn't translate"""
+    pass
+
+
+class Frame:
+    """
+    A Frame is the compile-time model of an Env created by the interpreter while evaluating the body of a Fn. Only
+    frames that may receive bindings are materialized as actual Env objects in compiled code
+    """
+    # enclosing frame
+    parent: 'Frame'
+
+    # Python variable holding this frame in compiled code
+    var: str
+
+    # names of the symbols that may be bound in this frame by `let`, `const` and `set`
+    names: set
+
+    # if True, any symbol may be bound in this frame, i.e. the frame is handed to a Fn that forwards it to others
+    forced: bool = False
+
+    # if True, this frame must exist even if nothing is bound in it, i.e. it's the parent of a materialized frame
+    needed: bool = False
+
+    def __init__(self, parent: 'Frame', var: str):
+        """Initializes a new Frame"""
+        self.parent = parent
+        self.var = var
+        self.names = set()
+
+    @property
+    def is_materialized(self) -> bool:
+        """Returns True if this frame needs to exist as an Env in compiled code"""
+        return self.forced or self.needed or bool(self.names)
+
+    def may_bind(self, name: str) -> bool:
+        """Returns True if the given symbol may be bound in this frame"""
+        return self.forced or name in self.names
+
+
+class Compiler:
+    """
+    The Compiler translates the body of a user Fn to a Python function once it has been called often enough.
+    Arithmetic and comparisons on numbers become native operators, parameters become Python locals and `while` and the
+    conditional special forms become Python `while` and `if` statements. Compiled code checks on entry that the Fns it
+    called directly are still bound to the same symbols, and falls back to the interpreter otherwise
+    """
+    # native Python operators for the standard arithmetic and comparison Fns
+    OPERATORS = {'+': '+', '-': '-', '*': '*', '/': '/', '<': '<', '<=': '<=', '>': '>', '>=': '>='}
+
+    # standard Fns that forward the env they are called with to other Fns
+    FORWARDING = ('map', 'filter', 'reduce')
+
+    # number of calls after which a Fn is compiled
+    threshold: int
+
+    def __init__(self, threshold: int):
+        """Initializes the Compiler"""
+        self.threshold = threshold
+
+        # each standard environment has its own copies of the standard Fns, which share their callables
+        std_env = Env.get_std()
+        self._operators = {std_env[Symbol(name)]._callable: op for name, op in self.OPERATORS.items()}
+        self._forwarding = {std_env[Symbol(name)]._callable for name in self.FORWARDING}
+        self._set = std_env[Symbol('set')]._callable
+
+    def tier(self, interpret: Callable, args: [Symbol], body: Expr, env: Env) -> Callable:
+        """
+        Wraps the interpreted implementation of a user Fn so that it's compiled after `threshold` calls
+        :param interpret: callable that evaluates the body of the Fn in the interpreter
+        :param args: parameter symbols
+        :param body: body of the Fn
+        :param env: environment where the Fn was declared
+        """
+        calls = 0
+        compiled = None
+        compilable = True
+
+        def call(*params, **kwargs):
+            nonlocal calls, compiled, compilable
+
+            if compiled is None and compilable:
+                calls += 1
+
+                if calls > self.threshold:
+                    try:
+                        compiled = self.compile(args, body, env)
+                    except Exception:
+                        # besides unsupported constructs, the generated code may exceed the limits of the Python
+                        # compiler (e.g. nesting), and tiering up must never break a program the interpreter runs
+                        compilable = False
+
+            # calls leaving some parameters unbound are left to the interpreter without discarding the compiled code
+            if compiled is not None and len(params) == len(args):
+                try:
+                    return compiled(*params)
+                except Deopt:
+                    # recompile with the new bindings once the Fn gets hot again
+                    compiled = None
+                    calls = 0
+
+            return interpret(*params, **kwargs)
+
+        return call
+
+    def compile(self, args: [Symbol], body: Expr, env: Env) -> Callable:
+        """
+        Compiles the body of a user Fn to a Python function taking the same parameters
+        :param args: parameter symbols
+        :param body: body of the Fn
+        :param env: environment where the Fn was declared
+        """
+        return _FunctionBuilder(self, args, body, env).build()
+
+
+class _FunctionBuilder:
+    """Generates the Python source for the body of a single Fn"""
+
+    def __init__(self, compiler: Compiler, args: [Symbol], body: Expr, env: Env):
+        """Initializes the builder"""
+        self.compiler = compiler
+        self.args = args
+        self.body = body
+        self.env = env
+
+        # frames are keyed by the node and slot that create them, so that they are shared between passes
+        self.frames = {}
+        self.outer = Frame(None, 'env')
+        self.local = Frame(self.outer, 'f0')
+
+        # names of the symbols bound anywhere in the body
+        self.bound = set()
+
+        # set whenever a frame is marked as materialized, to run another pass
+        self.changed = False
+
+    def build(self) -> Callable:
+        """Generates, compiles and returns the Python function"""
+        self.changed = True
+
+        while self.changed:
+            # marking frames only ever adds information, so this reaches a fixed point
+            self.changed = False
+            self.lines = []
+            self.consts = {}
+            self.symbols = {}
+            self.guards = {}
+            self.temps = 0
+            self.indent = 1
+            result = self.compile(self.body, self.local)
+            self.emit('return %s' % self.box(*result))
+
+        # the caller makes sure that every parameter is bound
+        prologue = ['def compiled(*params):']
+
+        for name, fn in self.guards.items():
+            prologue += ['    if env[%s] is not %s:' % (name, fn),
+                         '        raise Deopt']
+
+        if self.args:
+            prologue.append('    %s, = params' % ', '.join('p%d' % i for i in range(len(self.args))))
+
+        if self.local.is_materialized:
+            prologue += ['    f0 = Env(env)',
+                         '    dict.update(f0, zip(%s, params))' % self.const(tuple(self.args))]
+
+        source = '\n'.join(prologue + self.lines) + '\n'
+        namespace = dict(self.consts, env=self.env, Env=Env, List=List, Real=Real, Bool=Bool, Fn=Fn, NUMBER=NUMBER,
+                         LispError=LispError, Deopt=Deopt, MISSING=MISSING, argument_error=argument_error)
+        exec(compile(source, '<crisp>', 'exec'), namespace)
+
+        compiled = namespace['compiled']
+        compiled.source = source
+        return compiled
+
+    def emit(self, line: str):
+        """Appends a line to the function body at the current indentation"""
+        self.lines.append('    ' * self.indent + line)
+
+    def temp(self) -> str:
+        """Returns the name of a new temporary variable"""
+        self.temps += 1
+        return 't%d' % self.temps
+
+    def const(self, value: any) -> str:
+        """Returns the name of a constant holding the given value"""
+        for name, other in self.consts.items():
+            if other is value:
+                return name
+
+        name = 'k%d' % len(self.consts)
+        self.consts[name] = value
+        return name
+
+    def symbol(self, name: str) -> str:
+        """Returns the name of a constant holding a Symbol with the given name"""
+        if name not in self.symbols:
+            self.symbols[name] = self.const(Symbol(name))
+        return self.symbols[name]
+
+    def frame(self, key: tuple, parent: Frame) -> Frame:
+        """Returns the frame created for the given node and slot"""
+        if key not in self.frames:
+            self.frames[key] = Frame(parent, 'f%d' % (len(self.frames) + 1))
+        return self.frames[key]
+
+    def materialize(self, frame: Frame, name: str = None):
+        """Marks a frame as materialized, either because `name` may be bound in it or because it's forced"""
+        if frame is self.outer:
+            return
+
+        if name is None:
+            self.changed |= not frame.forced
+            frame.forced = True
+        else:
+            self.changed |= name not in frame.names
+            frame.names.add(name)
+
+        if not self.local.needed:
+            # materialized frames are chained to the local frame, which holds the parameters
+            self.changed = True
+            self.local.needed = True
+
+    @staticmethod
+    def nearest(frame: Frame) -> Frame:
+        """Returns the innermost materialized frame enclosing (or being) the given frame"""
+        while frame.parent is not None and not frame.is_materialized:
+            frame = frame.parent
+        return frame
+
+    def forced(self, frame: Frame) -> bool:
+        """Returns True if any symbol may be bound in a frame between the given one and the local frame"""
+        while frame is not self.outer:
+            if frame.forced:
+                return True
+            frame = frame.parent
+        return False
+
+    @staticmethod
+    def call_frame(frame: Frame) -> Frame:
+        """Returns the frame passed as the env of a Fn called by a node evaluated in the given frame"""
+        return frame.parent if frame.parent is not None else frame
+
+    @staticmethod
+    def box(value: str, kind: str) -> str:
+        """Returns an expression converting a value to an Expr"""
+        if kind == 'float':
+            return 'Real(%s)' % value
+        if kind == 'native':
+            return 'Env.number(%s)' % value
+        if kind == 'bool':
+            return 'Bool(%s)' % value
+        return value
+
+    def compile(self, node: Expr, frame: Frame) -> (str, str):
+        """
+        Emits the code evaluating a node in the given frame
+        :return: the name of the variable or constant holding the value, and its kind, which is one of `expr`
+                 (any Expr), `value` (an Expr which is not a Fn), `number` (an Int or a Real), `native` (an unboxed Int
+                 or Real), `float` (an unboxed Real) and `bool` (an unboxed Bool)
+        """
+        if isinstance(node, Symbol):
+            if node.is_lit:
+                return self.const(node), 'value'
+            return self.read(node, frame), 'expr'
+        if isinstance(node, NUMBER):
+            return self.const(node), 'number'
+        if isinstance(node, (String, Bool)):
+            return self.const(node), 'value'
+        if type(node) not in (List, Selector):
+            raise NotCompilable
+        if not node:
+            return self.const(node), 'value'
+
+        if isinstance(node[0], Symbol):
+            if node[0] in ('let', 'const'):
+                return self.compile_let(node, frame)
+            if node[0] in ('lambda', 'defun'):
+                raise NotCompilable
+            if node[0] == 'while':
+                return self.compile_while(node, frame)
+            if node[0] in ('if', 'cond'):
+                return self.compile_branches(node, frame)
+            if node[0] in ('and', 'or'):
+                return self.compile_logical(node, frame)
+
+        return self.compile_list(node, list(node), frame, id(node))
+
+    def read(self, symbol: Symbol, frame: Frame) -> str:
+        """Emits the code resolving a Symbol in the given frame"""
+        name = str(symbol)
+        key = self.symbol(name)
+        candidates = []
+
+        while frame.parent is not None:
+            if frame.is_materialized and (frame.may_bind(name) or frame is self.local and symbol in self.args):
+                candidates.append(frame)
+            frame = frame.parent
+
+        temp = self.temp()
+        indent = self.indent
+
+        for frame in candidates:
+            self.emit('%s = %s.get(%s, MISSING)' % (temp, frame.var, key))
+            self.emit('if %s is MISSING:' % temp)
+            self.indent += 1
+
+        if symbol in self.args and not self.local.is_materialized:
+            self.emit('%s = p%d' % (temp, self.args.index(symbol)))
+        else:
+            # the Symbol itself is looked up so that its syntactic information is reported if it isn't bound
+            self.emit('%s = env[%s]' % (temp, self.const(symbol)))
+
+        self.indent = indent
+        return temp
+
+    def compile_children(self, nodes: [Expr], frame: Frame, key: any, start: int = 0) -> [(str, str)]:
+        """
+        Emits the code evaluating each node of a list in its own frame, like the interpreter does
+        :param start: index of the first node to evaluate, if the values of the preceding ones are known
+        """
+        values = []
+
+        for i, node in enumerate(nodes[start:], start):
+            values.append(self.compile(node, self.child((key, i), frame)))
+
+        return values
+
+    def child(self, key: tuple, parent: Frame) -> Frame:
+        """Emits the code creating the frame a node is evaluated in as a child of a list, if it's materialized"""
+        frame = self.frame(key, parent)
+
+        if frame.is_materialized:
+            self.emit('%s = Env(%s)' % (frame.var, self.nearest(parent).var))
+
+        return frame
+
+    def compile_list(self, node: List, nodes: [Expr], frame: Frame, key: any) -> (str, str):
+        """Emits the code evaluating a list, which is a Fn call if its first element evaluates to a Fn"""
+        head = nodes[0]
+        fn = None
+
+        if isinstance(head, Symbol) and not head.is_lit and head not in self.args and str(head) not in self.bound \
+                and head in self.env and not self.forced(frame):
+            fn = self.env[head]
+
+            if not isinstance(fn, Fn):
+                fn = None
+
+        if fn is None:
+            return self.compile_dynamic(node, nodes, frame, key)
+
+        if fn._callable is self.compiler._set:
+            return self.compile_set(fn, nodes, frame, key)
+
+        self.guards[self.symbol(str(head))] = self.const(fn)
+        values = self.compile_children(nodes, frame, key, 1)
+        target = self.call_frame(frame)
+
+        if fn._callable in self.compiler._forwarding:
+            self.materialize(target)
+
+        op = self.compiler._operators.get(fn._callable)
+
+        if op and all(kind in ('expr', 'number', 'native', 'float') for _, kind in values) and \
+                (len(values) == 2 if op in ('<', '<=', '>', '>=') else len(values) >= (op in ('-', '/'))):
+            return self.compile_operator(op, values, nodes[1:])
+
+        temp = self.temp()
+        syntax = head.syntax_info
+        target = self.nearest(target)
+
+        if target is self.outer:
+            kwargs = self.const(dict(syntax, env=self.env))
+        else:
+            kwargs = '{**%s, \'env\': %s}' % (self.const(syntax), target.var)
+
+        self.emit('%s = %s(%s**%s)' % (temp, self.const(fn), ''.join('%s, ' % self.box(*v) for v in values), kwargs))
+
+        kind = 'expr'
+        types = fn._return_type if isinstance(fn._return_type, tuple) else (fn._return_type,)
+        if all(isinstance(t, type) and not issubclass(Fn, t) for t in types):
+            kind = 'number' if all(issubclass(t, NUMBER) for t in types) else 'value'
+
+        return temp, kind
+
+    def compile_operator(self, op: str, values: [(str, str)], nodes: [Expr]) -> (str, str):
+        """Emits the code applying a native operator to numbers"""
+        for (value, kind), node in zip(values, nodes):
+            if kind == 'expr':
+                self.emit('if not isinstance(%s, NUMBER):' % value)
+                self.emit('    raise argument_error(%s, %s)' % (value, self.const(node)))
+
+        temp = self.temp()
+        operands = [value for value, _ in values]
+
+        if not operands:
+            self.emit('%s = %s' % (temp, '0' if op == '+' else '1'))
+        elif len(operands) == 1:
+            self.emit('%s = %s(%s)' % (temp, 'float' if op == '/' else '+', operands[0]))
+        elif op == '-':
+            self.emit('%s = %s - (%s)' % (temp, operands[0], ' + '.join(operands[1:])))
+        else:
+            self.emit('%s = %s' % (temp, (' %s ' % op).join(operands)))
+
+        if op in ('<', '<=', '>', '>='):
+            return temp, 'bool'
+
+        # Int operands produce exact results unless divided
+        return temp, 'float' if op == '/' else 'native'
+
+    def compile_dynamic(self, node: List, nodes: [Expr], frame: Frame, key: any) -> (str, str):
+        """Emits the code evaluating a list whose first element isn't known to be a Fn at compile time"""
+        values = self.compile_children(nodes, frame, key)
+        syntax = self.const(node.syntax_info)
+        temp = self.temp()
+        boxed = [self.box(*v) for v in values]
+
+        if values[0][1] == 'expr':
+            # the Fn may be `set` or forward its env to `set`, so the frame it gets must exist
+            target = self.call_frame(frame)
+            self.materialize(target)
+
+            # the interpreter binds the syntactic information of a Symbol to its value when resolving it
+            head = self.const(nodes[0].syntax_info) if isinstance(nodes[0], Symbol) else '%s.syntax_info' % boxed[0]
+
+            self.emit('if isinstance(%s, Fn):' % boxed[0])
+            self.emit('    %s = %s(%s**%s, env=%s)' %
+                      (temp, boxed[0], ''.join('%s, ' % v for v in boxed[1:]), head, self.nearest(target).var))
+            self.emit('else:')
+            self.emit('    %s = List((%s), **%s)' % (temp, ''.join('%s, ' % v for v in boxed), syntax))
+            return temp, 'expr'
+
+        self.emit('%s = List((%s), **%s)' % (temp, ''.join('%s, ' % v for v in boxed), syntax))
+        return temp, 'value'
+
+    def compile_set(self, fn: Fn, nodes: [Expr], frame: Frame, key: any) -> (str, str):
+        """Emits the code for a call to `set` on a literal Symbol, which binds it in the frame passed as its env"""
+        if len(nodes) != 3 or not isinstance(nodes[1], Symbol) or not nodes[1].is_lit:
+            raise NotCompilable
+
+        name = nodes[1].name
+        target = self.call_frame(frame)
+        self.bound.add(name)
+        self.materialize(target, name)
+
+        self.guards[self.symbol(str(nodes[0]))] = self.const(fn)
+        value, kind = self.compile_children(nodes, frame, key, 2)[0]
+        symbol = self.symbol(name)
+        temp = self.temp()
+
+        # `set` may only rebind symbols that are already bound
+        self.emit('%s = %s' % (temp, self.box(value, kind)))
+        self.emit('%s[%s]' % (target.var, self.const(nodes[1])))
+        self.emit('%s.bind(%s, %s)' % (target.var, symbol, temp))
+        return temp, {'float': 'number', 'native': 'number', 'bool': 'value'}.get(kind, kind)
+
+    def compile_let(self, node: List, frame: Frame) -> (str, str):
+        """Emits the code for `let` and `const`, which bind symbols in the enclosing frame"""
+        if len(node) < 2 or type(node[1]) is not List:
+            raise NotCompilable
+
+        bindings = []
+
+        for binding in node[1]:
+            if isinstance(binding, Symbol) and not binding.is_lit:
+                bindings.append((binding.name, None))
+            elif type(binding) is List and len(binding) == 2 and isinstance(binding[0], Symbol) \
+                    and not binding[0].is_lit:
+                bindings.append((binding[0].name, binding[1]))
+            else:
+                raise NotCompilable
+
+        if len({name for name, _ in bindings}) != len(bindings):
+            raise NotCompilable
+
+        target = self.call_frame(frame)
+
+        for name, value in bindings:
+            self.bound.add(name)
+            self.materialize(target, name)
+
+            if value is None:
+                value = 'List()'
+            else:
+                value = self.box(*self.compile(value, frame))
+
+            temp = self.temp()
+            self.emit('%s = %s' % (temp, value))
+            self.emit('%s.bind(%s, %s)' % (target.var, self.symbol(name), temp))
+            self.emit('%s._mutable = %s' % (temp, node[0] == 'let'))
+
+        temp = self.temp()
+        self.emit('%s = List()' % temp)
+        return temp, 'value'
+
+    def compile_while(self, node: List, frame: Frame) -> (str, str):
+        """Emits the code for a `while` loop, which collects the value of its body on each iteration"""
+        if len(node) == 1:
+            raise NotCompilable
+
+        result = self.temp()
+        self.emit('%s = List()' % result)
+        self.emit('while True:')
+        self.indent += 1
+
+        self.emit('if not %s:' % self.compile_condition(node[1], frame)[0])
+        self.emit('    break')
+
+        if len(node) > 2:
+            value = self.compile_list(node, list(node[2:]), frame, (id(node), 'body'))
+            self.emit('%s.append(%s)' % (result, self.box(*value)))
+        else:
+            self.emit('%s.append(List(**%s))' % (result, self.const(node.syntax_info)))
+
+        self.indent -= 1
+        return result, 'value'
+
+    def compile_condition(self, node: Expr, frame: Frame) -> (str, str):
+        """Emits the code evaluating the condition of a special form, which must be a Bool"""
+        condition, kind = self.compile(node, frame)
+
+        if kind != 'bool' and not isinstance(node, Bool):
+            self.emit('if not isinstance(%s, Bool):' % condition)
+            self.emit('    raise LispError(\'se esperaba un valor booleano pero la expresión devolvió un valor del '
+                      'tipo `%%s`\' %% type(%s).__name__, **%s)' % (condition, self.const(node.syntax_info)))
+
+        return condition, kind
+
+    def compile_branches(self, node: List, frame: Frame) -> (str, str):
+        """
+        Emits the code for `if` and `cond`, which only evaluate the branch selected by their conditions. The clauses of
+        `cond` are tried in a single-pass loop left as soon as one of them holds, so that the generated code doesn't
+        nest deeper with each clause
+        """
+        key = id(node)
+
+        if node[0] == 'if':
+            if len(node) not in (3, 4):
+                raise NotCompilable
+            clauses = [((node[1], (key, 1)), (node[2], (key, 2)))]
+            default = (node[3], (key, 3)) if len(node) == 4 else None
+        else:
+            if not all(type(clause) is List and len(clause) == 2 for clause in node[1:]):
+                raise NotCompilable
+            clauses = [((clause[0], (key, i, 0)), (clause[1], (key, i, 1))) for i, clause in enumerate(node[1:], 1)]
+            default = None
+
+        result = self.temp()
+        indent = self.indent
+        branches = []
+
+        def compile_branch(branch: Expr, branch_key: tuple):
+            # the value is assigned once all branches are compiled and their kinds are known
+            branches.append(self.compile(branch, self.child(branch_key, frame)) + (len(self.lines), self.indent))
+            self.emit('pass')
+
+        if node[0] == 'cond':
+            self.emit('while True:')
+            self.indent += 1
+
+        for (condition, condition_key), (branch, branch_key) in clauses:
+            self.emit('if %s:' % self.compile_condition(condition, self.child(condition_key, frame))[0])
+            self.indent += 1
+            compile_branch(branch, branch_key)
+
+            if node[0] == 'cond':
+                self.emit('break')
+                self.indent -= 1
+            else:
+                self.indent -= 1
+                self.emit('else:')
+                self.indent += 1
+
+        if default is None:
+            branches.append(('List()', 'value', len(self.lines), self.indent))
+            self.emit('pass')
+        else:
+            compile_branch(*default)
+
+        if node[0] == 'cond':
+            self.emit('break')
+
+        self.indent = indent
+
+        # branches of different kinds are boxed
+        kinds = {kind for _, kind, _, _ in branches}
+        boxed = {{'float': 'number', 'native': 'number', 'bool': 'value'}.get(kind, kind) for kind in kinds}
+
+        for value, kind, line, indent in branches:
+            value = value if len(kinds) == 1 else self.box(value, kind)
+            self.lines[line] = '    ' * indent + '%s = %s' % (result, value)
+
+        if len(kinds) == 1:
+            return result, kinds.pop()
+        return result, boxed.pop() if len(boxed) == 1 else 'expr' if 'expr' in boxed else 'value'
+
+    def compile_logical(self, node: List, frame: Frame) -> (str, str):
+        """
+        Emits the code for `and` and `or`, which stop evaluating their operands once the result is known. Operands are
+        evaluated in a single-pass loop left as soon as one of them decides the result, so that the generated code
+        doesn't nest deeper with each operand
+        """
+        result = self.temp()
+        indent = self.indent
+        self.emit('%s = %s' % (result, node[0] == 'and'))
+
+        if len(node) > 1:
+            self.emit('while True:')
+            self.indent += 1
+
+        for i, operand in enumerate(node[1:], 1):
+            condition, kind = self.compile_condition(operand, self.child((id(node), i), frame))
+            self.emit('%s = %s' % (result, condition if kind == 'bool' else 'bool(%s)' % condition))
+
+            if i < len(node) - 1:
+                self.emit('if %s%s:' % ('not ' if node[0] == 'and' else '', result))
+                self.emit('    break')
+            else:
+                self.emit('break')
+
+        self.indent = indent
+        return result, 'bool'
+
+
+# placeholder for symbols that are not bound in a frame
+MISSING = object()
+
+
+def argument_error(value: Expr, node: Expr) -> LispError:
+    """Builds the error raised by compiled code when a native operator gets a value which is not a number"""
+    if isinstance(node, Symbol):
+        # the interpreter binds the syntactic information of a Symbol to its value when resolving it
+        value.bind_syntax_info(**node.syntax_info)
+    return Fn._argument_error(NUMBER, value)
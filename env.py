@@ -2,14 +2,26 @@
 
 import math
 import functools
+import itertools
 import operator
+import sys
 
 from .types import *
 
+# types of the values that can be iterated over
+ITERABLE = (List, View, Seq)
+
+# types of numeric values
+NUMBER = (Int, Real)
+
 
 class Env(dict):
     outer = None
 
+    # prebuilt standard environment, which is copied into every new standard environment so that programs embedding
+    # the VM don't rebuild it for each of them
+    _std_snapshot: dict = None
+
     def __init__(self, outer=None):
         dict.__init__(self)
         if isinstance(outer, Env):
@@ -18,6 +30,19 @@ class Env(dict):
     def bind(self, k, v):
         dict.__setitem__(self, k, v)
 
+    def bind_host(self, name: str, value: any, *signature: [..., type]):
+        """
+        Binds a Python value to a symbol. Callables are wrapped in a Fn with the given signature, which is inferred
+        from their annotations if omitted. Sequences and buffers are exposed as read-only Views without copying them
+        :param name: symbol name
+        :param value: Python value
+        :param signature: return type followed by parameter types, as in Fn
+        """
+        if callable(value) and not isinstance(value, Expr):
+            value = Fn.host(value, *signature)
+
+        self.bind(Symbol(name), Fn._normalize(value))
+
     def __getitem__(self, k):
         if dict.__contains__(self, k):
             return dict.__getitem__(self, k)
@@ -42,6 +67,19 @@ class Env(dict):
     @staticmethod
     def get_std():
         """Returns the standard environment"""
+        if Env._std_snapshot is None:
+            Env._std_snapshot = Env.build_std()
+
+        std_env = Env()
+        # values are copied, since resolving a Symbol binds its syntactic information to the value and `let` and
+        # `const` flag the values they bind as mutable or immutable. Fn copies share their callables, which the compiler
+        # recognizes the standard Fns by
+        dict.update(std_env, {k: v.copy() if isinstance(v, Fn) else type(v)(v) for k, v in Env._std_snapshot.items()})
+        return std_env
+
+    @staticmethod
+    def build_std():
+        """Builds the standard environment from scratch"""
         std_env = Env()
         std_env.update({
             Symbol('e'): Real(math.e),
@@ -53,20 +91,34 @@ class Env(dict):
             Symbol('send'): Fn(List, ..., Expr, callable=lambda *r, **s: print(*r)),
             Symbol('sendf'): Fn(List, String, ..., Expr, callable=lambda f, *r, **s: print(f % r)),
 
-            Symbol('set'): Fn(Expr, Symbol, Expr, callable=Env.set),
-            Symbol('apply'): Fn(Expr, Fn, List, callable=lambda f, l, **s: f(*l)),
-
-            Symbol('+'): Fn(Real, ..., Real, callable=lambda *r, **s: sum(r)),
-            Symbol('-'): Fn(Real, ..., Real, callable=lambda *r, **s: r[0] + -sum(r[1:])),
-            Symbol('*'): Fn(Real, ..., Real, callable=lambda *r, **s: functools.reduce(operator.mul, r, 1)),
-            Symbol('/'): Fn(Real, ..., Real, callable=lambda *r, **s: functools.reduce(operator.truediv, r[1:], r[0])),
-
-            Symbol('<'): Fn(Bool, Real, Real, callable=lambda a, b, **s: a < b),
-            Symbol('<='): Fn(Bool, Real, Real, callable=lambda a, b, **s: a <= b),
-            Symbol('>'): Fn(Bool, Real, Real, callable=lambda a, b, **s: a > b),
-            Symbol('>='): Fn(Bool, Real, Real, callable=lambda a, b, **s: a >= b),
-
-            Symbol('='): Fn(Bool, object, object, callable=Env.strict_eq),
+            Symbol('set'): Fn(Expr, Symbol, Expr, callable=Env.set, normalize=False),
+            Symbol('apply'): Fn(Expr, Fn, ITERABLE, callable=lambda f, l, **s: f(*l), normalize=False),
+
+            Symbol('range'): Fn(Seq, ..., NUMBER, callable=Env.range, normalize=False),
+            Symbol('map'): Fn(Seq, Fn, ITERABLE, ..., ITERABLE,
+                              callable=lambda f, *r, **s: Seq(lambda: map(lambda *v: f(*v, **s), *r)), normalize=False),
+            Symbol('filter'): Fn(Seq, Fn, ITERABLE, callable=Env.filter, normalize=False),
+            Symbol('take'): Fn(Seq, NUMBER, ITERABLE, callable=Env.take, normalize=False),
+            Symbol('drop'): Fn(Seq, NUMBER, ITERABLE, callable=Env.drop, normalize=False),
+            Symbol('reduce'): Fn(Expr, Fn, Expr, ITERABLE,
+                                 callable=lambda f, v, l, **s: functools.reduce(lambda a, b: f(a, b, **s), l, v),
+                                 normalize=False),
+            Symbol('list'): Fn(List, ITERABLE, callable=lambda l, **s: List(l), normalize=False),
+
+            Symbol('+'): Fn(NUMBER, ..., NUMBER, callable=lambda *r, **s: Env.number(sum(r)), normalize=False),
+            Symbol('-'): Fn(NUMBER, ..., NUMBER, callable=lambda *r, **s: Env.number(r[0] - sum(r[1:])),
+                            normalize=False),
+            Symbol('*'): Fn(NUMBER, ..., NUMBER, callable=lambda *r, **s: Env.number(math.prod(r)), normalize=False),
+            Symbol('/'): Fn(Real, ..., NUMBER,
+                            callable=lambda *r, **s: Real(functools.reduce(operator.truediv, r[1:], r[0])),
+                            normalize=False),
+
+            Symbol('<'): Fn(Bool, NUMBER, NUMBER, callable=lambda a, b, **s: a < b),
+            Symbol('<='): Fn(Bool, NUMBER, NUMBER, callable=lambda a, b, **s: a <= b),
+            Symbol('>'): Fn(Bool, NUMBER, NUMBER, callable=lambda a, b, **s: a > b),
+            Symbol('>='): Fn(Bool, NUMBER, NUMBER, callable=lambda a, b, **s: a >= b),
+
+            Symbol('='): Fn(Bool, object, object, callable=Env.strict_eq, normalize=False),
             Symbol('!='): Fn(Bool, object, object, callable=lambda a, b, **s: not Env.strict_eq(a, b)),
 
             Symbol('!'): Fn(Bool, Bool, callable=lambda v, **s: not v),
@@ -75,18 +127,100 @@ class Env(dict):
             Symbol('||'): Fn(Bool, ..., Bool,
                              callable=lambda *r, **s: functools.reduce(lambda a, b: a or b, r, Bool(False))),
 
-            Symbol('~'): Fn(Real, Real, callable=lambda n, **s: Real(float(~int(n)))),
-            Symbol('&'): Fn(Real, ..., Real,
-                            callable=lambda *r, **s: functools.reduce(lambda a, b: int(a) & int(b), r, -1)),
-            Symbol('|'): Fn(Real, ..., Real,
-                            callable=lambda *r, **s: functools.reduce(lambda a, b: int(a) | int(b), r, -1))
+            Symbol('~'): Fn(NUMBER, NUMBER, callable=lambda n, **s: Env.bitwise(lambda a, b: ~b, 0, (n,)),
+                            normalize=False),
+            Symbol('&'): Fn(NUMBER, ..., NUMBER, callable=lambda *r, **s: Env.bitwise(operator.and_, -1, r),
+                            normalize=False),
+            Symbol('|'): Fn(NUMBER, ..., NUMBER, callable=lambda *r, **s: Env.bitwise(operator.or_, 0, r),
+                            normalize=False)
         })
 
         return std_env
 
+    @staticmethod
+    def number(value: 'int | float') -> 'Int | Real':
+        """Converts the result of an arithmetic operation to an Int, or a Real if any operand was a Real"""
+        return Int(value) if isinstance(value, int) else Real(value)
+
+    @staticmethod
+    def bitwise(op: Callable, identity: int, operands: tuple) -> 'Int | Real':
+        """
+        Folds a bitwise operator over integral values. Ints are operated on directly, while Reals are truncated to
+        integers and produce a Real result
+        """
+        if all(type(v) is Int for v in operands):
+            return Int(functools.reduce(op, operands, identity))
+        return Real(functools.reduce(lambda a, b: op(int(a), int(b)), operands, identity))
+
+    @staticmethod
+    def range(*bounds: 'Int | Real', **kwargs) -> Seq:
+        """
+        Returns a Seq of numbers in [start, stop) separated by step, which are Ints unless any bound is a Real. Takes
+        (stop), (start stop) or (start stop step) and counts up from 0 endlessly if no bounds are given
+        """
+        if len(bounds) > 3:
+            raise LispError('`range` espera como mucho 3 argumentos, pero se pasaron %d' % len(bounds), **kwargs)
+
+        start, stop, step = 0, math.inf, 1
+
+        if len(bounds) == 1:
+            stop, = bounds
+        elif len(bounds) == 2:
+            start, stop = bounds
+        elif len(bounds) == 3:
+            start, stop, step = bounds
+
+        if not step:
+            raise LispError('el paso de `range` no puede ser 0', **kwargs)
+
+        def gen():
+            for n in itertools.count():
+                value = start + n * step
+                if value >= stop if step > 0 else value <= stop:
+                    break
+                yield Env.number(value)
+
+        return Seq(gen)
+
+    @staticmethod
+    def filter(f: Fn, l: Iterable, **kwargs) -> Seq:
+        """Returns a Seq of the elements for which the predicate returns true, which must return a Bool"""
+        def test(value: Expr) -> Bool:
+            result = f(value, **kwargs)
+
+            if not isinstance(result, Bool):
+                raise LispError('se esperaba un valor booleano pero el predicado de `filter` devolvió un valor del '
+                                'tipo `%s`' % type(result).__name__, **kwargs)
+            return result
+
+        return Seq(lambda: filter(test, l))
+
+    @staticmethod
+    def take(n: 'Int | Real', l: Iterable, **kwargs) -> Seq:
+        """Returns a Seq of the first n elements of a sequence"""
+        n = Env.count(n, **kwargs)
+        return Seq(lambda: itertools.islice(l, n))
+
+    @staticmethod
+    def drop(n: 'Int | Real', l: Iterable, **kwargs) -> Seq:
+        """Returns a Seq of the elements of a sequence after the first n"""
+        n = Env.count(n, **kwargs)
+        return Seq(lambda: itertools.islice(l, n, None))
+
+    @staticmethod
+    def count(n: 'Int | Real', **kwargs) -> int:
+        """Validates the number of elements taken or dropped from a sequence"""
+        # Ints may be too large to be converted to floats, but they are always finite
+        if n < 0 or isinstance(n, Real) and not math.isfinite(n):
+            raise LispError('se esperaba un número de elementos finito y no negativo, pero se pasó `%s`' % n,
+                            **kwargs)
+
+        # islice can't go further than sys.maxsize elements, which no sequence can be traversed past anyway
+        return min(int(n), sys.maxsize)
+
     @staticmethod
     def strict_eq(a: Expr, b: Expr, **kwargs) -> Bool:
-        if type(a) != type(b):
+        if type(a) != type(b) and not (isinstance(a, NUMBER) and isinstance(b, NUMBER)):
             raise LispError('no se puede comparar un valor del tipo `%s` a otro del tipo `%s`' %
                             (type(b).__name__, type(a).__name__), **kwargs)
         return Bool(a == b)
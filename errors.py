@@ -1,6 +1,6 @@
 # coding: utf8
 
-from lisp import TextPosition
+from .util import TextPosition
 
 
 class LispError(Exception):
@@ -15,7 +15,14 @@ class LispError(Exception):
         :param start: token start
         :param end: token end
         """
-        preview = '% 4d  %s\n% 4s--' % (start.line, program.split('\n')[start.line - 1], '\\')
+        # program may be a fragment of a larger input, in which case positions are relative to the whole input
+        origin = getattr(program, 'origin', TextPosition(0, 1, 1))
+        line = program.split('\n')[start.line - origin.line]
+
+        if start.line == origin.line:
+            line = ' ' * (origin.column - 1) + line
+
+        preview = '% 4d  %s\n% 4s--' % (start.line, line, '\\')
 
         for i in range(0, start.column - 1):
             preview += '-'
@@ -1,5 +1,7 @@
 # coding: utf8
 
+from collections.abc import Iterable, Iterator
+
 from . import *
 
 
@@ -47,8 +49,17 @@ class Parser:
 
             try:
                 if token['token'].startswith('0x'):
-                    # parse hex number
-                    return Real(float.fromhex(token['token']), **params)
+                    # parse hex number, which is only a Real if it has a fraction or an exponent
+                    try:
+                        return Int(token['token'], 16, **params)
+                    except ValueError:
+                        return Real(float.fromhex(token['token']), **params)
+
+                # integer number?
+                try:
+                    return Int(token['token'], **params)
+                except ValueError:
+                    pass
 
                 # decimal number?
                 return Real(token['token'], **params)
@@ -57,9 +68,10 @@ class Parser:
                 return Symbol(token['token'], **params)
 
     def tokenize(self, expr: str) -> TokenList:
+        origin = expr.origin if isinstance(expr, Source) else TextPosition(0, 1, 1)
         tokens = []  # token list
         i = 0  # current index in expr
-        line, column = 1, 1  # current text position
+        line, column = origin.line, origin.column  # current text position
         atom = ''  # current atom
         braces = []  # position of opening braces
 
@@ -70,24 +82,24 @@ class Parser:
         while i < len(expr):
             if expr[i] in self.DELIMITER:
                 if expr[i] in self.BRACES.keys():
-                    braces.append(TextPosition(i, line, column))
+                    braces.append(TextPosition(origin.index + i, line, column))
                     tokens.append(dict(type='punct',
                                        token=expr[i],
-                                       start=TextPosition(i, line, column),
-                                       end=TextPosition(i + 1, line, column + 1)))
+                                       start=TextPosition(origin.index + i, line, column),
+                                       end=TextPosition(origin.index + i + 1, line, column + 1)))
                 elif expr[i] in self.BRACES.values():
                     if not braces:
                         # missing opening brace
                         raise LispError('no se esperaba un paréntesis',
                                         program=expr,
-                                        start=TextPosition(i, line, column),
-                                        end=TextPosition(i + 1, line, column + 1))
+                                        start=TextPosition(origin.index + i, line, column),
+                                        end=TextPosition(origin.index + i + 1, line, column + 1))
 
                     braces.pop()
                     tokens.append(dict(type='punct',
                                        token=expr[i],
-                                       start=TextPosition(i, line, column),
-                                       end=TextPosition(i + 1, line, column + 1)))
+                                       start=TextPosition(origin.index + i, line, column),
+                                       end=TextPosition(origin.index + i + 1, line, column + 1)))
                 elif expr[i] == self.QUOTE:
                     # save start values
                     i0 = i
@@ -118,8 +130,8 @@ class Parser:
                             else:
                                 raise LispError('no se reconoce esta secuencia de escape',
                                                 program=expr,
-                                                start=TextPosition(i, line, column),
-                                                end=TextPosition(i + 1, line, column + 1))
+                                                start=TextPosition(origin.index + i, line, column),
+                                                end=TextPosition(origin.index + i + 1, line, column + 1))
 
                         # move along the text position
                         if expr[i] == '\n':
@@ -132,13 +144,13 @@ class Parser:
                             # reached EOF and no closing quote was found
                             raise LispError('faltan las comillas de cierre',
                                             program=expr,
-                                            start=TextPosition(i0, line0, column0),
-                                            end=TextPosition(i0 + 1, line0, column0 + 1))
+                                            start=TextPosition(origin.index + i0, line0, column0),
+                                            end=TextPosition(origin.index + i0 + 1, line0, column0 + 1))
 
                     tokens.append(dict(type='lit',
                                        token=atom,
-                                       start=TextPosition(i0, line0, column0),
-                                       end=TextPosition(i, line, column)))
+                                       start=TextPosition(origin.index + i0, line0, column0),
+                                       end=TextPosition(origin.index + i, line, column)))
                     atom = ''
 
             elif expr[i] not in self.WHITESPACE:
@@ -154,8 +166,8 @@ class Parser:
 
                 tokens.append(dict(type='atom',
                                    token=atom,
-                                   start=TextPosition(i0, line0, column0),
-                                   end=TextPosition(i, line, column)))
+                                   start=TextPosition(origin.index + i0, line0, column0),
+                                   end=TextPosition(origin.index + i, line, column)))
                 atom = ''
 
                 column -= 1
@@ -175,3 +187,72 @@ class Parser:
                             end=braces[-1])
 
         return TokenList(expr, tokens)
+
+    def split(self, chunks: Iterable[str]) -> Iterator[Source]:
+        """
+        Splits a stream of program text into top-level expressions
+        :param chunks: iterable of consecutive fragments of the program text
+        :return: one Source fragment per top-level expression, carrying its position in the whole input
+        """
+        form = []  # characters of the current top-level expression
+        origin = None  # position where the current top-level expression starts
+        depth = 0  # number of open braces
+        quoted, escaped = False, False
+
+        # current text position
+        i = 0
+        line, column = 1, 1
+
+        for chunk in chunks:
+            for c in chunk:
+                if form and not depth and not quoted and form[0] not in self.DELIMITER and c in self.DELIMITER:
+                    # a top-level atom ends right before this character
+                    yield Source(''.join(form), origin)
+                    form = []
+
+                if form or c not in self.WHITESPACE:
+                    if not form:
+                        origin = TextPosition(i, line, column)
+
+                    form.append(c)
+
+                    if quoted:
+                        if escaped:
+                            escaped = False
+                        elif c == self.ESCAPE:
+                            escaped = True
+                        elif c == self.QUOTE:
+                            quoted = False
+                    elif c == self.QUOTE:
+                        quoted = True
+                    elif c in self.BRACES:
+                        depth += 1
+                    elif c in self.BRACE_TYPES:
+                        depth -= 1
+
+                    if depth <= 0 and not quoted and (c == self.QUOTE or c in self.BRACE_TYPES):
+                        # end of a top-level list or string literal, or an unexpected closing brace that will be
+                        # reported by the tokenizer
+                        yield Source(''.join(form), origin)
+                        form = []
+                        depth = 0
+
+                # move along the text position
+                if c == '\n':
+                    column = 0
+                    line += 1
+                column += 1
+                i += 1
+
+        if form:
+            # the tokenizer reports any unterminated list or string literal left at the end of the input
+            yield Source(''.join(form), origin)
+
+    def read(self, chunks: Iterable[str]) -> Iterator[Expr]:
+        """
+        Tokenizes and parses a stream of program text one top-level expression at a time
+        :param chunks: iterable of consecutive fragments of the program text
+        :return: the AST of each top-level expression, as soon as it has been read
+        """
+        for source in self.split(chunks):
+            yield self.parse(self.tokenize(source))
@@ -1,16 +1,10 @@
 # coding: utf8
 
-import math
-import numbers
-import re
-import string
-
-from collections import namedtuple
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from functools import reduce
-from typing import Callable, Optional, Text, List as _List
 from . import *
 
-IDENTIFIER = re.compile(r'^[^0-9\'][^\']*$')
+DIGITS = '0123456789'
 
 
 class Expr:
@@ -34,7 +28,7 @@ class Expr:
         :param start: index, line and column in the text buffer where the expression starts
         :param end: index, line and column in the text buffer where the expression ends
         """
-        if {'program', 'start', 'end'} <= set(kwargs):
+        if kwargs and {'program', 'start', 'end'} <= kwargs.keys():
             self._program = kwargs['program']
             self._start = kwargs['start']
             self._end = kwargs['end']
@@ -57,12 +51,12 @@ class Expr:
         return dict(program=self._program, start=self._start, end=self._end)
 
     @property
-    def start(self) -> Optional[TextPosition]:
+    def start(self) -> 'TextPosition | None':
         """Returns the index, line and column in the text buffer where the expression starts"""
         return self._start
 
     @property
-    def end(self) -> Optional[TextPosition]:
+    def end(self) -> 'TextPosition | None':
         """Returns the index, line and column in the text buffer where the expression end"""
         return self._end
 
@@ -85,7 +79,7 @@ class Atom(Expr):
         return self._mutable
 
 
-class List(Expr, _List[Expr]):
+class List(Expr, list):
     """A List is a set of Atoms or Lists"""
 
     def __init__(self, *args, **kwargs):
@@ -101,7 +95,7 @@ class List(Expr, _List[Expr]):
         return str(self)
 
 
-class Symbol(Atom, Text):
+class Symbol(Atom, str):
     """A Symbol is an identifier that can be resolved to a value"""
     # if True, this is a literal (quoted) symbol and may not be resolved to a value
     _lit: bool = False
@@ -119,12 +113,12 @@ class Symbol(Atom, Text):
         lit = name[0] == "'"
         name = name[1:] if lit else name
 
-        self = Text.__new__(cls, name)
+        self = str.__new__(cls, name)
         self._lit = lit
         self._name = name
 
-        if not IDENTIFIER.match(self):
-            suggestion = ("'" if lit else '') + name.replace("'", '').lstrip(string.digits)
+        if not name or name[0] in DIGITS or "'" in name:
+            suggestion = ("'" if lit else '') + name.replace("'", '').lstrip(DIGITS)
             raise LispError('`%s` no es un identificador válido' % self, suggestion, **kwargs)
 
         return self
@@ -159,7 +153,7 @@ class Symbol(Atom, Text):
         return value
 
 
-class String(Atom, Text):
+class String(Atom, str):
     """A String is an ordered sequence of bytes"""
 
     def __new__(cls, *args, **kwargs):
@@ -178,6 +172,18 @@ class String(Atom, Text):
             .replace('"', '\\"') + '"'
 
 
+class Int(Atom, int):
+    """An Int is an arbitrary-precision integer value"""
+
+    def __new__(cls, *args, **kwargs):
+        """Creates a new Int value"""
+        return int.__new__(cls, *args)
+
+    def __init__(self, *args, **kwargs):
+        """Initializes a new Int value"""
+        Atom.__init__(self, **kwargs)
+
+
 class Real(Atom, float):
     """A Real is a floating-point value"""
 
@@ -224,6 +230,69 @@ class Selector(List):
     pass
 
 
+class View(Atom, Sequence):
+    """
+    A View is a read-only sequence backed by host data (Python sequences, buffers or NumPy arrays). Elements are
+    normalized when they are accessed, so the host data is never copied
+    """
+    # host object holding the elements
+    _data: Sequence
+
+    def __init__(self, data: Sequence, *args, **kwargs):
+        """Initializes a new View over the given host data"""
+        super().__init__(False, *args, **kwargs)
+        self._data = data
+
+    def __getitem__(self, index):
+        """Retrieves an element, or a View over a slice of the host data"""
+        if isinstance(index, slice):
+            return View(self._data[index])
+
+        return Fn._normalize(self._data[index])
+
+    def __len__(self) -> int:
+        """Obtains the number of elements in this View"""
+        return len(self._data)
+
+    def __str__(self) -> str:
+        """Returns a string containing all the elements of this View"""
+        return '(' + ' '.join(repr(el) for el in self) + ')' if len(self) else 'nil'
+
+    def __repr__(self) -> str:
+        """Returns the string representation of this View"""
+        return str(self)
+
+    @property
+    def data(self) -> Sequence:
+        """Returns the host object holding the elements of this View"""
+        return self._data
+
+
+class Seq(Atom, Iterable):
+    """
+    A Seq is a lazy sequence whose elements are produced on demand. Iterating over a Seq calls its factory again, so
+    it may be traversed several times as long as the factory returns a fresh iterator
+    """
+    # callable returning an iterator over the elements
+    _factory: Callable[[], Iterator]
+
+    def __init__(self, factory: Callable[[], Iterator], *args, **kwargs):
+        """Initializes a new Seq"""
+        super().__init__(False, *args, **kwargs)
+        self._factory = factory
+
+    def __iter__(self) -> Iterator:
+        """Returns an iterator over the elements of this Seq"""
+        return self._factory()
+
+    def __str__(self) -> str:
+        return '<Seq>'
+
+    def __repr__(self) -> str:
+        """Returns the string representation of this Seq"""
+        return str(self)
+
+
 class Fn(Atom, Callable):
     """
     A Fn is a callable function which is defined by a Python function or method
@@ -265,41 +334,112 @@ class Fn(Atom, Callable):
             """Returns True if this parameter list has an ellipsis"""
             return self._ellipsis_index > -1
 
+        def compile(self) -> 'Callable[[tuple, dict], None] | None':
+            """
+            Builds a function that checks the arity and argument types of a call against this parameter list, which
+            takes the positional arguments tuple and the keyword arguments dictionary of the call. Returns None if no
+            check is needed at all
+            """
+            untyped = (Expr, object)
+
+            if self.has_ellipsis:
+                head = self._types[:self._ellipsis_index]
+                rest = self[self._ellipsis_index]
+                offset = len(head)
+
+                if all(t in untyped for t in head):
+                    if rest in untyped:
+                        # variadic untyped, i.e. (..., Expr)
+                        return None
+
+                    # variadic homogeneous, i.e. (..., Real)
+                    def check(args: tuple, kwargs: dict):
+                        for arg in args[offset:] if offset else args:
+                            if not isinstance(arg, rest):
+                                raise Fn._argument_error(rest, arg)
+
+                    return check
+
+                def check(args: tuple, kwargs: dict):
+                    for t, arg in zip(head, args):
+                        if not isinstance(arg, t):
+                            raise Fn._argument_error(t, arg)
+
+                    if rest not in untyped:
+                        for arg in args[offset:]:
+                            if not isinstance(arg, rest):
+                                raise Fn._argument_error(rest, arg)
+
+                return check
+
+            types = self._types
+            arity = len(types)
+
+            if all(t in untyped for t in types):
+                # fixed-arity untyped, i.e. (Expr Expr)
+                def check(args: tuple, kwargs: dict):
+                    if len(args) > arity:
+                        raise Fn._arity_error(arity, args, kwargs)
+
+                return check
+
+            # fixed-arity typed, i.e. (Real Real)
+            def check(args: tuple, kwargs: dict):
+                if len(args) > arity:
+                    raise Fn._arity_error(arity, args, kwargs)
+
+                for t, arg in zip(types, args):
+                    if not isinstance(arg, t):
+                        raise Fn._argument_error(t, arg)
+
+            return check
+
     # Fn return type
     _return_type: type
 
     # parameter list
     _signature: ParameterTypeList
 
+    # arity and argument type checker for the parameter list (if any)
+    _check: Callable[[tuple, dict], None]
+
+    # if True, the values returned by the callable object are normalized
+    _normalize_return: bool
+
     # callable object
     _callable: Callable
 
     # original expression (if any)
     _expr: Expr
 
-    def __init__(self, return_type: type, *signature: [..., type], callable: Callable, expr: Expr = None, **kwargs):
-        """Initializes this Fn"""
+    def __init__(self, return_type: type, *signature: [..., type], callable: Callable, expr: Expr = None,
+                 normalize: bool = True, **kwargs):
+        """
+        Initializes this Fn
+        :param normalize: if False, the callable object is trusted to return Expr values of the return type
+        """
         super().__init__(**kwargs)
         self._return_type = return_type
         self._signature = self.ParameterTypeList(signature)
+        self._check = self._signature.compile()
+        self._normalize_return = normalize
         self._callable = callable
         self._expr = expr
 
     def __call__(self, *args, **kwargs):
         """Evaluates this Fn"""
-        # check arity
-        if len(args) > len(self._signature) and not self._signature.has_ellipsis:
-            raise LispError('la función esperaba %d argumentos, pero se pasaron %d' %
-                            (len(self._signature), len(args)), **kwargs)
+        if self._check is not None:
+            self._check(args, kwargs)
 
-        # perform type check in positional arguments
-        for i in range(0, len(args)):
-            if not isinstance(args[i], self._signature[i]):
-                raise LispError('la función esperaba un argumento del tipo `%s`, pero se pasó uno del tipo `%s`' %
-                                (self._signature[i].__name__, type(args[i]).__name__), **args[i].syntax_info)
+        if not self._normalize_return:
+            return self._callable(*args, **kwargs)
 
         return_value = Fn._normalize(self._callable(*args, **kwargs))
 
+        if isinstance(return_value, View) and not isinstance(return_value, self._return_type):
+            # host sequences are copied into a List when the Fn is declared to return one
+            return_value = List(return_value)
+
         # check return value type
         if not isinstance(return_value, self._return_type):
             raise LispError('la función intentó devolver un valor del tipo `%s` declarando un tipo de retorno `%s`' %
@@ -310,22 +450,131 @@ class Fn(Atom, Callable):
     def __str__(self):
         return str(self._expr) if self._expr else '<Fn>'
 
+    def __repr__(self) -> str:
+        """Returns the string representation of this Fn"""
+        return str(self)
+
+    def copy(self) -> 'Fn':
+        """Returns a new Fn sharing the callable and the signature of this one"""
+        fn = object.__new__(Fn)
+        fn.__dict__.update(self.__dict__)
+        return fn
+
+    @staticmethod
+    def host(callable: Callable, return_type: type = None, *signature: [..., type]) -> 'Fn':
+        """
+        Creates a Fn from a Python callable. If no types are given, they are inferred from the callable annotations
+        :param callable: Python callable
+        :param return_type: Fn return type
+        :param signature: parameter types
+        """
+        if return_type is None:
+            # inspect is slow to import and only needed here
+            import inspect
+
+            try:
+                host_signature = inspect.signature(callable)
+            except (ValueError, TypeError):
+                # many builtins don't expose their signature, so they take any number of arguments of any type
+                return Fn(Expr, ..., Expr, callable=lambda *r, **s: callable(*map(Fn._unwrap, r)))
+
+            return_type = Fn._host_type(host_signature.return_annotation)
+            signature = []
+
+            for parameter in host_signature.parameters.values():
+                if parameter.kind == parameter.VAR_POSITIONAL:
+                    signature += [..., Fn._host_type(parameter.annotation)]
+                elif parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD):
+                    signature.append(Fn._host_type(parameter.annotation))
+
+        return Fn(return_type, *signature, callable=lambda *r, **s: callable(*map(Fn._unwrap, r)))
+
+    @staticmethod
+    def _host_type(annotation: any) -> type:
+        """Translates the annotation of a Python callable to the corresponding Expr type"""
+        if isinstance(annotation, type) and issubclass(annotation, Expr):
+            return annotation
+        if annotation is bool:
+            return Bool
+        if annotation is int:
+            return Int
+        if annotation is float or getattr(annotation, '__module__', None) == 'numbers':
+            return Int, Real
+        if annotation is str:
+            return String
+        if annotation in (list, tuple, Sequence, bytes, bytearray, memoryview):
+            return List, View
+        if annotation in (Iterable, Iterator):
+            return List, View, Seq
+        return Expr
+
+    @staticmethod
+    def _arity_error(arity: int, args: tuple, kwargs: dict) -> LispError:
+        """Builds the error raised when a Fn is called with too many arguments"""
+        return LispError('la función esperaba %d argumentos, pero se pasaron %d' % (arity, len(args)), **kwargs)
+
+    @staticmethod
+    def _argument_error(expected: any, arg: Expr) -> LispError:
+        """Builds the error raised when a Fn is called with an argument of the wrong type"""
+        return LispError('la función esperaba un argumento del tipo `%s`, pero se pasó uno del tipo `%s`' %
+                         (Fn._type_name(expected), type(arg).__name__), **arg.syntax_info)
+
+    @staticmethod
+    def _type_name(types: any) -> str:
+        """Returns the name of a type or a tuple of types"""
+        return ' | '.join(t.__name__ for t in types) if isinstance(types, tuple) else types.__name__
+
+    @staticmethod
+    def _unwrap(value: Expr) -> any:
+        """Translates a value so that it can be passed to a Python callable"""
+        if isinstance(value, View):
+            return value.data
+        if isinstance(value, Bool):
+            return bool(value)
+        return value
+
     @staticmethod
     def _normalize(value: any) -> Expr:
         """Normalizes a value"""
 
         if isinstance(value, Expr):
             return value
-        if isinstance(value, list) or isinstance(value, set) or isinstance(value, tuple):
-            return List(value)
-        if isinstance(value, dict):
-            return List(reduce(lambda k, v: k + v, value.items()))
         if isinstance(value, bool):
             return Bool(value)
-        if isinstance(value, numbers.Real):
+        if isinstance(value, int):
+            return Int(value)
+        if isinstance(value, float):
             return Real(value)
         if isinstance(value, str):
             return String(value)
         if value is None:
             return List()
+        if isinstance(value, dict):
+            return List(reduce(lambda k, v: k + v, value.items()))
+        if isinstance(value, (set, frozenset)):
+            return List(value)
+        if hasattr(value, '__array_interface__'):
+            # NumPy arrays are indexed in place, scalars are converted to the corresponding Python value
+            return View(value) if value.ndim else Fn._normalize(value.item())
+        try:
+            # bytes and any other object exposing the buffer protocol
+            buffer = memoryview(value)
+        except TypeError:
+            pass
+        else:
+            # memoryview can't index multi-dimensional buffers in place, so those are converted to nested lists
+            return View(buffer) if buffer.ndim == 1 else Fn._normalize(buffer.tolist())
+        if isinstance(value, Sequence):
+            return View(value)
+        if isinstance(value, Iterator):
+            # host iterators can only be traversed once
+            return Seq(lambda: map(Fn._normalize, value))
+
+        # numbers is only needed for uncommon host numeric types, such as Fraction
+        import numbers
+
+        if isinstance(value, numbers.Integral):
+            return Int(value)
+        if isinstance(value, numbers.Real):
+            return Real(value)
         return value
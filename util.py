@@ -1,4 +1,16 @@
 from collections import namedtuple
 
 TokenList = namedtuple('TokenList', 'input_expr tokens')
-TextPosition = namedtuple('TextPosition', 'index line column')
\ No newline at end of file
+TextPosition = namedtuple('TextPosition', 'index line column')
+
+
+class Source(str):
+    """A Source is a fragment of program text that starts at a given position of a larger input"""
+    # index, line and column in the original input where this fragment starts
+    origin: TextPosition
+
+    def __new__(cls, text: str, origin: TextPosition = TextPosition(0, 1, 1)):
+        """Creates a new Source fragment"""
+        self = str.__new__(cls, text)
+        self.origin = origin
+        return self
@@ -1,6 +1,9 @@
 # coding: utf8
 
-from typing import Union
+import sys
+
+from collections.abc import Iterable, Iterator
+from io import TextIOBase
 
 from .types import *
 from .env import *
@@ -9,17 +12,94 @@ from .parser import *
 
 class VM(Parser):
     """The Lisp VM evaluates a program in a sandboxed environment"""
+    # number of characters or bytes read at once from streams and files
+    CHUNK_SIZE = 1 << 16
+
+    # compiler for hot user Fns (if enabled)
+    compiler = None
 
-    def __init__(self):
-        """Initializes the VM"""
+    def __init__(self, tier_up: int = None):
+        """
+        Initializes the VM
+        :param tier_up: if set, user Fns are compiled to Python functions after being called this many times
+        """
         super(VM, self).__init__()
 
-    def eval(self, value: Union[str, Expr], env: Env = None) -> Optional[Expr]:
+        if tier_up is not None:
+            from .compiler import Compiler
+
+            self.compiler = Compiler(tier_up)
+
+    def eval_stream(self, stream: 'TextIOBase | Iterable[str]', env: Env = None) -> Iterator[Expr]:
+        """
+        Evaluates a program one top-level expression at a time
+        :param stream: text stream or iterable of consecutive fragments of the program text
+        :param env: environment shared by all top-level expressions
+        :return: the result of each top-level expression, as soon as it has been evaluated
+        """
+        if env is None:
+            # load default environment
+            env = Env.get_std()
+
+        if hasattr(stream, 'readline'):
+            # text streams are read one line at a time, since reading a whole chunk from a pipe or a terminal would
+            # block until it's filled
+            chunks = iter(stream.readline, '')
+        elif hasattr(stream, 'read'):
+            chunks = iter(lambda: stream.read(self.CHUNK_SIZE), '')
+        else:
+            chunks = stream
+
+        for expr in self.read(chunks):
+            yield self.eval(expr, env)
+
+    def eval_file(self, path: str, env: Env = None, encoding: str = 'utf8') -> Iterator[Expr]:
+        """
+        Evaluates a program file one top-level expression at a time, mapping it into memory whenever possible
+        :param path: path to the program file, or `-` to read the program from the standard input
+        :param env: environment shared by all top-level expressions
+        :param encoding: text encoding of the program file
+        :return: the result of each top-level expression, as soon as it has been evaluated
+        """
+        if path == '-':
+            yield from self.eval_stream(sys.stdin, env)
+            return
+
+        import codecs
+        import mmap
+
+        decoder = codecs.getincrementaldecoder(encoding)()
+
+        with open(path, 'rb') as file:
+            try:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # empty files and pipes can't be mapped
+                buffer = None
+
+            if buffer is None:
+                # read whatever is available, so that expressions written to a pipe are evaluated right away
+                chunks = iter(lambda: file.read1(self.CHUNK_SIZE), b'')
+            else:
+                chunks = (buffer[i:i + self.CHUNK_SIZE] for i in range(0, len(buffer), self.CHUNK_SIZE))
+
+            def decode():
+                for chunk in chunks:
+                    yield decoder.decode(chunk)
+                yield decoder.decode(b'', final=True)
+
+            try:
+                yield from self.eval_stream(decode(), env)
+            finally:
+                if buffer is not None:
+                    buffer.close()
+
+    def eval(self, value: 'str | Expr', env: Env = None) -> 'Expr | None':
         if env is None:
             # load default environment
             env = Env.get_std()
 
-        if type(value) == str:
+        if type(value) in (str, Source):
             # received a Python str to be evaluated
             return self.eval(self.parse(self.tokenize(value)), env)
         elif isinstance(value, Symbol):
@@ -33,7 +113,7 @@ class VM(Parser):
                     if not isinstance(value[1], List):
                         raise LispError('`%s` espera una lista de símbolos o pares símbolo-expresión' % value[0],
                                         List([value[0], List(map(lambda v: v.name, value[1:]))]) if all(
-                                            isinstance(v, Text) for v in value[1:]) else '',
+                                            isinstance(v, str) for v in value[1:]) else '',
                                         **value[1].syntax_info)
                     env_update = dict()
 
@@ -145,7 +225,7 @@ class VM(Parser):
                         body.env = env
                         if isinstance(body.value, Fn):
                             fn = Fn(Expr, *sig, callable=lambda *r, **s: body.value(*r, **s), expr=value,
-                                    **value.syntax_info)
+                                    normalize=False, **value.syntax_info)
 
                     if not fn:
                         def fn(*params, **kwargs):
@@ -153,7 +233,10 @@ class VM(Parser):
                             local_env.update(dict(zip(args, params)))
                             return self.eval(body, local_env)
 
-                        fn = Fn(Expr, *sig, callable=fn, expr=value, **value.syntax_info)
+                        if self.compiler is not None:
+                            fn = self.compiler.tier(fn, args, body, env)
+
+                        fn = Fn(Expr, *sig, callable=fn, expr=value, normalize=False, **value.syntax_info)
 
                     if isinstance(symbol, Symbol):
                         environment = env if env.outer is None else env.outer
@@ -166,20 +249,50 @@ class VM(Parser):
                         raise LispError('se esperaba una expresión condicional', **value[0].syntax_info)
 
                     result = List()
-                    while True:
-                        condition = self.eval(value[1], env)
-
-                        if not isinstance(condition, Bool):
-                            raise LispError(
-                                'se esperaba un valor booleano pero la expresión devolvió un valor del tipo `%s`' %
-                                type(condition).__name__, **value[1].syntax_info)
-                        elif not condition:
-                            break
-
+                    while self.eval_condition(value[1], env):
                         result.append(
                             self.eval(List([e for e in value[2:]] if len(value) > 2 else [], **value.syntax_info), env))
 
                     return result
+                elif value[0] == 'if':
+                    if len(value) < 3:
+                        raise LispError('la expresión `if` espera una condición, una consecuencia y opcionalmente '
+                                        'una alternativa', **value.syntax_info)
+                    if len(value) > 4:
+                        raise LispError(
+                            'sobran elementos en la expresión `if`',
+                            program=value[4].syntax_info['program'],
+                            start=value[4].syntax_info['start'],
+                            end=value[-1].syntax_info['end'])
+
+                    # only the branch selected by the condition is evaluated
+                    if self.eval_condition(value[1], Env(outer=env)):
+                        return self.eval(value[2], Env(outer=env))
+                    return self.eval(value[3], Env(outer=env)) if len(value) > 3 else List()
+                elif value[0] == 'cond':
+                    for clause in value[1:]:
+                        if not isinstance(clause, List):
+                            raise LispError('se esperaba un par condición-expresión, no un valor del tipo `%s`' %
+                                            type(clause).__name__, **clause.syntax_info)
+                        if len(clause) != 2:
+                            raise LispError('la cláusula de `cond` espera una condición y una expresión',
+                                            **clause.syntax_info)
+
+                        # clauses are tried in order until a condition holds
+                        if self.eval_condition(clause[0], Env(outer=env)):
+                            return self.eval(clause[1], Env(outer=env))
+
+                    return List()
+                elif value[0] in ('and', 'or'):
+                    # `and` stops at the first false operand and `or` at the first true one
+                    result = Bool(value[0] == 'and')
+
+                    for operand in value[1:]:
+                        result = self.eval_condition(operand, Env(outer=env))
+                        if bool(result) != (value[0] == 'and'):
+                            break
+
+                    return result
 
             # evaluate list
             value = List(map(lambda v: self.eval(v, Env(outer=env)), value), **value.syntax_info)
@@ -190,3 +303,19 @@ class VM(Parser):
                                 **{**value[0].syntax_info, **dict(env=env if env.outer is None else env.outer)})
 
         return value
+
+    def eval_condition(self, value: Expr, env: Env) -> Bool:
+        """
+        Evaluates the condition of a special form, which must be a Bool
+        :param value: condition expression
+        :param env: environment the condition is evaluated in
+        :return: the value of the condition
+        """
+        condition = self.eval(value, env)
+
+        if not isinstance(condition, Bool):
+            raise LispError(
+                'se esperaba un valor booleano pero la expresión devolvió un valor del tipo `%s`' %
+                type(condition).__name__, **value.syntax_info)
+
+        return condition